@@ -1,13 +1,23 @@
 import pyperclip
 import subprocess
 from langdetect import detect
-import torch
 import soundfile as sf
 from io import BytesIO
 import numpy as np
 import re
 import os
+import gc
+import time
+import threading
+import shutil
+import zlib
 import datetime
+import json
+import hashlib
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import messagebox
 from num2words import num2words
@@ -95,7 +105,20 @@ VOICE_MAP = {
     "es": ("es","v3_es","es"),
 }
 
-loaded_models = {}
+def env_number(name, cast=int):
+    """Числове значення зі змінної оточення; некоректне — 0 з попередженням"""
+    raw = os.environ.get(name, "0")
+    try:
+        return max(0, cast(raw))
+    except ValueError:
+        print(f"Некоректне значення {name}={raw!r}, використовую 0")
+        return 0
+
+# Резидентність моделей: 0 — без обмеження.
+# Бюджет пам'яті наближений: розмір моделі — приріст RSS під час її завантаження.
+MODEL_MAX_RESIDENT = env_number("TTS_MAX_MODELS")
+MODEL_MEMORY_BUDGET_MB = env_number("TTS_MODEL_BUDGET_MB")
+MODEL_IDLE_SECONDS = env_number("TTS_MODEL_IDLE_SECONDS", float)
 
 # ============================================================
 # 1. Визначення домінантної мови
@@ -311,30 +334,379 @@ def split_into_chunks(text, max_len=1000):
 # ============================================================
 # 5. TTS
 # ============================================================
-def load_model(language, default_speaker):
-    if language in loaded_models:
-        return loaded_models[language]
+SAMPLE_RATE = 48000
 
+def current_rss():
+    """RSS процесу в байтах (Linux /proc/self/statm)"""
     try:
-        model, _ = torch.hub.load(
-            repo_or_dir='snakers4/silero-models',
-            model='silero_tts',
-            language=language,
-            speaker=default_speaker
-        )
-        loaded_models[language] = model
-        return model
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class ModelManager:
+    """LRU-кеш моделей з лімітом кількості/пам'яті та вивантаженням за простоєм"""
+
+    def __init__(self, max_models=0, budget_bytes=0, idle_timeout=0):
+        self.max_models = max_models
+        self.budget_bytes = budget_bytes
+        self.idle_timeout = idle_timeout
+        self.models = OrderedDict()
+        self.rss = {}
+        self.last_used = {}
+        self.leases = {}
+        self.listeners = []
+        self.stats = {"hits": 0, "loads": 0, "reloads": 0, "evictions": 0, "load_seconds": 0.0}
+        self._seen = set()
+        # Найбільший виміряний розмір моделі; переживає unload, бо після
+        # gc.collect() сторінки лишаються у процесі й reload показує ~0
+        self._sizes = {}
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def _emit(self, event, key, **info):
+        for listener in self.listeners:
+            try:
+                listener(event, key, info)
+            except Exception as e:
+                print(f"Помилка обробника подій моделей: {e}")
+
+    def get(self, key, loader):
+        """Повертає модель з кешу або завантажує її через loader()"""
+        with self._lock:
+            self._start_sweeper()
+            self.evict_idle(keep=key)
+
+            if key in self.models:
+                self.models.move_to_end(key)
+                self.last_used[key] = time.monotonic()
+                self.stats["hits"] += 1
+                return self.models[key]
+
+            rss_before = current_rss()
+            started = time.monotonic()
+            model = loader()
+            if model is None:
+                return None
+            elapsed = time.monotonic() - started
+
+            # Приріст RSS — наближена оцінка; важкі імпорти робить викликач до get()
+            rss = max(0, current_rss() - rss_before)
+            event = "reload" if key in self._seen else "load"
+            self._seen.add(key)
+            self.stats[event + "s"] += 1
+            self.stats["load_seconds"] += elapsed
+
+            self._sizes[key] = max(self._sizes.get(key, 0), rss)
+            self.models[key] = model
+            self.rss[key] = self._sizes[key]
+            self.last_used[key] = time.monotonic()
+            self._emit(event, key, seconds=elapsed, rss=rss)
+
+            self._enforce_limits(keep=key)
+            return model
+
+    @contextmanager
+    def lease(self, key, loader):
+        """Модель на час використання: орендовану не вивантажать ні LRU, ні таймер"""
+        with self._lock:
+            model = self.get(key, loader)
+            if model is not None:
+                self.leases[key] = self.leases.get(key, 0) + 1
+        try:
+            yield model
+        finally:
+            if model is not None:
+                with self._lock:
+                    self.leases[key] -= 1
+                    if not self.leases[key]:
+                        del self.leases[key]
+                    if key in self.models:
+                        self.last_used[key] = time.monotonic()
+
+    def unload(self, key, reason="manual"):
+        with self._lock:
+            if key not in self.models:
+                return
+            del self.models[key]
+            rss = self.rss.pop(key, 0)
+            idle = time.monotonic() - self.last_used.pop(key, time.monotonic())
+            gc.collect()
+            self.stats["evictions"] += 1
+            self._emit("evict", key, reason=reason, rss=rss, idle=idle)
+
+    def evict_idle(self, keep=None):
+        if not self.idle_timeout:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for key in [k for k, t in self.last_used.items()
+                        if k != keep and k not in self.leases and now - t > self.idle_timeout]:
+                self.unload(key, reason="idle")
+
+    def _start_sweeper(self):
+        """Фоновий потік звільняє простійні моделі, поки процес нічого не озвучує"""
+        if not self.idle_timeout or (self._sweeper and self._sweeper.is_alive()):
+            return
+        interval = min(max(self.idle_timeout / 2, 0.05), 30)
+
+        def sweep():
+            while not self._stop.wait(interval):
+                self.evict_idle()
+
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=sweep, name="model-idle-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self):
+        self._stop.set()
+
+    def resident_bytes(self):
+        return sum(self.rss.values())
+
+    def _enforce_limits(self, keep=None):
+        while len(self.models) > 1:
+            over_count = self.max_models and len(self.models) > self.max_models
+            over_budget = self.budget_bytes and self.resident_bytes() > self.budget_bytes
+            if not (over_count or over_budget):
+                break
+            oldest = next((k for k in self.models if k != keep and k not in self.leases), None)
+            if oldest is None:
+                break
+            self.unload(oldest, reason="count" if over_count else "budget")
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, resident=list(self.models), resident_bytes=self.resident_bytes())
+
+def log_model_event(event, key, info):
+    details = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in info.items())
+    print(f"[models] {event} {key}: {details}")
+
+model_manager = ModelManager(
+    max_models=MODEL_MAX_RESIDENT,
+    budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+    idle_timeout=MODEL_IDLE_SECONDS,
+)
+if os.environ.get("TTS_MODEL_LOG"):
+    model_manager.listeners.append(log_model_event)
+
+def silero_loader(language, default_speaker):
+    """loader для model_manager; None, якщо torch недоступний"""
+    try:
+        # torch імпортуємо лише тут — stub/espeak працюють без нього.
+        # Імпорт стоїть до get(), щоб його пам'ять не зарахувалась першій моделі.
+        import torch
     except Exception as e:
         print(f"Помилка завантаження моделі для {language}: {e}")
         return None
 
-def synthesize_fragment(lang_code, text):
-    if lang_code not in VOICE_MAP:
-        return None
+    def loader():
+        try:
+            model, _ = torch.hub.load(
+                repo_or_dir='snakers4/silero-models',
+                model='silero_tts',
+                language=language,
+                speaker=default_speaker
+            )
+            return model
+        except Exception as e:
+            print(f"Помилка завантаження моделі для {language}: {e}")
+            return None
 
-    language, default_speaker, num_lang = VOICE_MAP[lang_code]
+    return loader
+
+def load_model(language, default_speaker):
+    loader = silero_loader(language, default_speaker)
+    return model_manager.get(language, loader) if loader else None
+
+def resample_audio(audio, src_rate, dst_rate):
+    """Лінійний ресемплінг для бекендів з власною частотою дискретизації"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    dst_len = max(1, int(round(len(audio) * dst_rate / src_rate)))
+    dst_x = np.linspace(0, len(audio) - 1, dst_len)
+    return np.interp(dst_x, np.arange(len(audio)), audio).astype(np.float32)
+
+class TTSBackend:
+    """Базовий інтерфейс бекенда синтезу"""
+    name = "base"
+    sample_rates = (SAMPLE_RATE,)
+    supports_batch = False
+
+    def is_available(self, lang_code):
+        return True
+
+    def load(self, lang_code):
+        """Готує бекенд до синтезу (для Silero — вантажить модель)"""
+        return self.is_available(lang_code)
+
+    def speakers(self, lang_code):
+        return []
+
+    def speakers_known(self, lang_code):
+        return True
+
+    def capabilities(self, lang_code):
+        return {
+            "name": self.name,
+            "sample_rates": list(self.sample_rates),
+            "speakers": self.speakers(lang_code),
+            "speakers_known": self.speakers_known(lang_code),
+            "batch": self.supports_batch,
+            "streaming": True,
+        }
+
+    def synthesize_chunk(self, lang_code, chunk, speaker=None, sample_rate=SAMPLE_RATE):
+        raise NotImplementedError
+
+    def synthesize_batch(self, lang_code, chunks, speaker=None, sample_rate=SAMPLE_RATE):
+        return [self.synthesize_chunk(lang_code, c, speaker, sample_rate) for c in chunks]
+
+    def synthesize_stream(self, lang_code, chunks, speaker=None, sample_rate=SAMPLE_RATE):
+        """Віддає аудіо по чанку, щойно його озвучено"""
+        if not self.is_available(lang_code):
+            print(f"Бекенд '{self.name}' недоступний для '{lang_code}'")
+            return
+        for chunk in chunks:
+            try:
+                audio = self.synthesize_chunk(lang_code, chunk, speaker, sample_rate)
+            except Exception as e:
+                print(f"Помилка синтезу чанка: {e}")
+                continue
+            if audio is not None:
+                yield audio
+
+    def synthesize_all(self, lang_code, chunks, speaker=None, sample_rate=SAMPLE_RATE):
+        """Усі чанки разом: пакетом, якщо бекенд це вміє, інакше потоком"""
+        if self.supports_batch and self.is_available(lang_code):
+            try:
+                parts = self.synthesize_batch(lang_code, chunks, speaker, sample_rate)
+                return [audio for audio in parts if audio is not None]
+            except Exception as e:
+                print(f"Помилка пакетного синтезу, переходжу на потік: {e}")
+        return list(self.synthesize_stream(lang_code, chunks, speaker, sample_rate))
+
+class SileroBackend(TTSBackend):
+    """Silero через torch.hub — бекенд за замовчуванням"""
+    name = "silero"
+    sample_rates = (8000, 24000, 48000)
+
+    def _model(self, lang_code):
+        language, default_speaker, _ = VOICE_MAP[lang_code]
+        return load_model(language, default_speaker)
+
+    def is_available(self, lang_code):
+        return lang_code in VOICE_MAP
+
+    def load(self, lang_code):
+        return self.is_available(lang_code) and self._model(lang_code) is not None
+
+    def _resident(self, lang_code):
+        # Без завантаження: голоси відомі лише у вже резидентної моделі
+        return model_manager.models.get(VOICE_MAP[lang_code][0]) if lang_code in VOICE_MAP else None
+
+    def speakers(self, lang_code):
+        return list(getattr(self._resident(lang_code), 'speakers', []))
+
+    def speakers_known(self, lang_code):
+        return self._resident(lang_code) is not None
+
+    def synthesize_chunk(self, lang_code, chunk, speaker=None, sample_rate=SAMPLE_RATE):
+        language, default_speaker, _ = VOICE_MAP[lang_code]
+        loader = silero_loader(language, default_speaker)
+        if loader is None:
+            raise RuntimeError(f"модель для '{lang_code}' недоступна")
+        # Оренда не дає таймеру простою вивантажити модель посеред apply_tts
+        with model_manager.lease(language, loader) as model:
+            if model is None:
+                raise RuntimeError(f"модель для '{lang_code}' недоступна")
+            speakers = getattr(model, 'speakers', [])
+            if speaker not in speakers:
+                speaker = default_speaker if default_speaker in speakers else model.speakers[0]
+            return model.apply_tts(text=chunk, speaker=speaker, sample_rate=sample_rate)
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng на CPU — дешевий бекенд для низькопріоритетних задач"""
+    name = "espeak"
+    sample_rates = (8000, 16000, 22050, 24000, 48000)
+    native_rate = 22050
+    variants = ("m3", "f3")
+
+    def is_available(self, lang_code):
+        return lang_code in VOICE_MAP and shutil.which("espeak-ng") is not None
+
+    def speakers(self, lang_code):
+        return [lang_code] + [f"{lang_code}+{v}" for v in self.variants]
+
+    def synthesize_chunk(self, lang_code, chunk, speaker=None, sample_rate=SAMPLE_RATE):
+        voice = speaker if speaker in self.speakers(lang_code) else lang_code
+        proc = subprocess.run(
+            ["espeak-ng", "--stdout", "--stdin", "-v", voice],
+            input=chunk.encode("utf-8"),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode(errors="replace").strip())
+        audio, rate = sf.read(BytesIO(proc.stdout), dtype="float32")
+        return resample_audio(audio, rate, sample_rate)
+
+class StubBackend(TTSBackend):
+    """Детермінований синус замість голосу — для тестів і бенчмарків без torch"""
+    name = "stub"
+    sample_rates = (8000, 16000, 24000, 48000)
+    supports_batch = True
+    seconds_per_char = 0.05
+
+    def speakers(self, lang_code):
+        return ["stub_0", "stub_1"]
+
+    def _tone(self, lang_code, chunk, speaker, sample_rate):
+        seed = zlib.crc32(f"{lang_code}|{speaker}|{chunk}".encode("utf-8"))
+        return 150 + seed % 450, max(1, int(len(chunk) * self.seconds_per_char * sample_rate))
+
+    def synthesize_chunk(self, lang_code, chunk, speaker=None, sample_rate=SAMPLE_RATE):
+        return self.synthesize_batch(lang_code, [chunk], speaker, sample_rate)[0]
+
+    def synthesize_batch(self, lang_code, chunks, speaker=None, sample_rate=SAMPLE_RATE):
+        # Одна спільна вісь часу на весь пакет
+        tones = [self._tone(lang_code, c, speaker, sample_rate) for c in chunks]
+        if not tones:
+            return []
+        t = np.arange(max(n for _, n in tones), dtype=np.float32) / sample_rate
+        return [(0.2 * np.sin(2 * np.pi * freq * t[:n])).astype(np.float32) for freq, n in tones]
+
+# Реєстр бекендів; мова без запису в LANGUAGE_BACKENDS іде на DEFAULT_BACKEND
+BACKENDS = {
+    "silero": SileroBackend(),
+    "espeak": EspeakBackend(),
+    "stub": StubBackend(),
+}
+LANGUAGE_BACKENDS = {}
+DEFAULT_BACKEND = os.environ.get("TTS_BACKEND", "silero")
+
+def register_backend(name, backend, languages=()):
+    BACKENDS[name] = backend
+    for lang_code in languages:
+        LANGUAGE_BACKENDS[lang_code] = name
+
+def get_backend(lang_code):
+    name = LANGUAGE_BACKENDS.get(lang_code, DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        print(f"Невідомий бекенд '{name}', використовую silero")
+        name = "silero"
+    elif name != "silero" and not BACKENDS[name].is_available(lang_code):
+        print(f"Бекенд '{name}' недоступний для '{lang_code}', використовую silero")
+        name = "silero"
+    return BACKENDS[name]
+
+def prepare_fragment(lang_code, text):
+    """Нормалізує фрагмент і ріже його на чанки"""
+    _, _, num_lang = VOICE_MAP[lang_code]
 
-    # Нормалізація
     text = normalize_abbreviations(text, lang_code)
 
     if re.search(r"\d", text):
@@ -343,31 +715,239 @@ def synthesize_fragment(lang_code, text):
     if re.search(r"\d{4}-\d{2}-\d{2}|\d{2}[./]\d{2}[./]\d{4}", text):
         text = normalize_dates(text, num_lang)
 
-    # Розбиття на чанки
-    chunks = split_into_chunks(text, max_len=1000)
+    return split_into_chunks(text, max_len=1000)
 
-    # Завантаження моделі
-    model = load_model(language, default_speaker)
-    if model is None:
+def synthesize_fragment(lang_code, text, backend=None, speaker=None):
+    if lang_code not in VOICE_MAP:
         return None
 
-    speaker = default_speaker if default_speaker in getattr(model, 'speakers', []) else model.speakers[0]
+    # Нормалізація та розбиття на чанки
+    chunks = prepare_fragment(lang_code, text)
 
     # Озвучення
-    audio_parts = []
-    for chunk in chunks:
-        try:
-            audio = model.apply_tts(text=chunk, speaker=speaker, sample_rate=48000)
-            audio_parts.append(audio)
-        except Exception as e:
-            print(f"Помилка синтезу чанка: {e}")
-            continue
+    backend = backend or get_backend(lang_code)
+    audio_parts = backend.synthesize_all(lang_code, chunks, speaker, SAMPLE_RATE)
 
     if not audio_parts:
         return None
 
     return np.concatenate(audio_parts)
 
+# ============================================================
+# 6. Запис та пакетний рендер
+# ============================================================
+def get_download_dir():
+    """Отримує шлях до Downloads через XDG"""
+    xdg_download = os.path.expanduser("~/Downloads")
+    config_file = os.path.expanduser("~/.config/user-dirs.dirs")
+
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, "r") as f:
+                for line in f:
+                    if line.startswith("XDG_DOWNLOAD_DIR"):
+                        path = line.split("=")[1].strip().strip('"')
+                        xdg_download = os.path.expandvars(path)
+        except Exception:
+            pass
+
+    return xdg_download
+
+def encode_audio(audio, output_file, fmt="mp3"):
+    """Пише аудіо у файл; все, крім WAV, кодується через ffmpeg"""
+    buffer = BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format="WAV")
+
+    if fmt == "wav":
+        with open(output_file, "wb") as f:
+            f.write(buffer.getvalue())
+        return subprocess.CompletedProcess([], 0, b"", b"")
+
+    return subprocess.run(
+        ["ffmpeg", "-y", "-i", "pipe:0", "-f", fmt, output_file],
+        input=buffer.getvalue(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+def load_manifest(path):
+    """Маніфест — JSON-список або JSON Lines з полями text, language, speaker, format"""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read().strip()
+
+    if raw.startswith("["):
+        try:
+            jobs = json.loads(raw)
+        except ValueError as e:
+            print(f"Некоректний маніфест {path}: {e}")
+            return []
+        return jobs if isinstance(jobs, list) else []
+
+    # Зіпсований рядок стає None, щоб номери задач збігались із рядками
+    jobs = []
+    for number, line in enumerate(raw.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            jobs.append(json.loads(line))
+        except ValueError as e:
+            print(f"Рядок {number} маніфесту некоректний: {e}")
+            jobs.append(None)
+    return jobs
+
+# Формати, які пакетний рендер передає у ffmpeg
+MATRIX_FORMATS = ("wav", "mp3", "ogg", "flac")
+MATRIX_FIELDS = ("text", "language", "speaker", "format", "backend")
+
+def matrix_output_name(backend_name, lang_code, speaker, text, fmt):
+    """Детермінована назва: та сама задача завжди дає той самий файл"""
+    digest = hashlib.sha1(f"{backend_name}|{lang_code}|{speaker}|{text}".encode("utf-8")).hexdigest()[:10]
+    speaker_tag = re.sub(r"[^\w.-]+", "_", speaker or "default")
+    return f"{backend_name}_{lang_code}_{speaker_tag}_{digest}.{fmt}"
+
+def parse_matrix_job(job):
+    """Перевіряє задачу маніфесту; повертає (причина пропуску, поля задачі)"""
+    if not isinstance(job, dict):
+        return "задача має бути JSON-об'єктом", None
+
+    bad_fields = [f for f in MATRIX_FIELDS if job.get(f) is not None and not isinstance(job[f], str)]
+    if bad_fields:
+        return f"поля {', '.join(bad_fields)} мають бути рядками", None
+
+    text = (job.get("text") or "").strip()
+    lang_code = job.get("language")
+    speaker = job.get("speaker") or None
+    fmt = (job.get("format") or "mp3").lower()
+
+    if not text:
+        return "порожній текст", None
+    if not lang_code:
+        return "не вказано мову", None
+    if lang_code not in VOICE_MAP:
+        return f"мова '{lang_code}' не підтримується", None
+
+    backend_name = job.get("backend") or LANGUAGE_BACKENDS.get(lang_code, DEFAULT_BACKEND)
+    if backend_name not in BACKENDS:
+        return f"невідомий бекенд '{backend_name}'", None
+    if fmt not in MATRIX_FORMATS:
+        return f"формат '{fmt}' не підтримується", None
+
+    return None, (backend_name, lang_code, text, speaker, fmt)
+
+def render_matrix(jobs, out_dir, workers=2):
+    """Рендерить тексти × спікери × формати, групуючи задачі за моделлю"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Групи: (бекенд, мова) → (текст, спікер) → формати.
+    # Один синтез на пару текст/спікер, нормалізація — один раз на текст/мову.
+    # Мова обов'язкова: мішані тексти тут не діляться на фрагменти, як у main().
+    groups = OrderedDict()
+    skipped = []
+    for idx, job in enumerate(jobs):
+        reason, parsed = parse_matrix_job(job)
+        if reason:
+            print(f"Задача {idx}: {reason}, пропускаю")
+            skipped.append({"job": idx, "reason": reason})
+            continue
+
+        backend_name, lang_code, text, speaker, fmt = parsed
+        units = groups.setdefault((backend_name, lang_code), OrderedDict())
+        unit = units.setdefault((text, speaker), {"formats": [], "jobs": []})
+        unit["jobs"].append(idx)
+        if fmt not in unit["formats"]:
+            unit["formats"].append(fmt)
+
+    prepared = {}
+    report = {"models": {}, "outputs": [], "skipped": skipped}
+    total_started = time.monotonic()
+
+    def render_unit(backend_name, lang_code, text, speaker, formats):
+        backend = BACKENDS[backend_name]
+        parts = backend.synthesize_all(lang_code, prepared[(lang_code, text)], speaker, SAMPLE_RATE)
+        if not parts:
+            return 0.0, []
+        audio = np.concatenate(parts)
+
+        outputs = []
+        for fmt in formats:
+            output_file = os.path.join(out_dir, matrix_output_name(backend_name, lang_code, speaker, text, fmt))
+            try:
+                proc = encode_audio(audio, output_file, fmt)
+            except Exception as e:
+                print(f"Помилка кодування {output_file}: {e}")
+                continue
+            if proc.returncode == 0:
+                outputs.append(output_file)
+            else:
+                print(f"Помилка кодування {output_file}: {proc.stderr.decode(errors='replace').strip()}")
+        return len(audio) / SAMPLE_RATE, outputs
+
+    for (backend_name, lang_code), units in groups.items():
+        backend = BACKENDS[backend_name]
+        started = time.monotonic()
+
+        audio_seconds, failed, outputs = 0.0, 0, []
+        # Модель вантажимо до потоків: після цього відомі справжні голоси
+        if backend.load(lang_code):
+            known = backend.speakers(lang_code) if backend.speakers_known(lang_code) else None
+            for (text, speaker), unit in list(units.items()):
+                if speaker is not None and known is not None and speaker not in known:
+                    reason = f"спікер '{speaker}' недоступний для {backend_name}:{lang_code}"
+                    for idx in unit["jobs"]:
+                        print(f"Задача {idx}: {reason}, пропускаю")
+                        skipped.append({"job": idx, "reason": reason})
+                    del units[(text, speaker)]
+
+            for text, _ in units:
+                if (lang_code, text) not in prepared:
+                    prepared[(lang_code, text)] = prepare_fragment(lang_code, text)
+
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = [
+                    pool.submit(render_unit, backend_name, lang_code, text, speaker, unit["formats"])
+                    for (text, speaker), unit in units.items()
+                ]
+                for future in futures:
+                    try:
+                        seconds, files = future.result()
+                    except Exception as e:
+                        print(f"Помилка рендеру: {e}")
+                        seconds, files = 0.0, []
+                    audio_seconds += seconds
+                    failed += 0 if files else 1
+                    outputs.extend(files)
+        else:
+            print(f"Бекенд '{backend_name}' недоступний для '{lang_code}'")
+            failed = len(units)
+
+        wall_seconds = time.monotonic() - started
+        report["models"][f"{backend_name}:{lang_code}"] = {
+            "units": len(units),
+            "failed": failed,
+            "files": len(outputs),
+            "audio_seconds": round(audio_seconds, 2),
+            "wall_seconds": round(wall_seconds, 2),
+            "throughput": round(audio_seconds / wall_seconds, 2) if wall_seconds else 0.0,
+        }
+        report["outputs"].extend(outputs)
+
+    total_audio = sum(m["audio_seconds"] for m in report["models"].values())
+    total_wall = time.monotonic() - total_started
+    report["total"] = {
+        "audio_seconds": round(total_audio, 2),
+        "wall_seconds": round(total_wall, 2),
+        "throughput": round(total_audio / total_wall, 2) if total_wall else 0.0,
+        "models": model_manager.summary(),
+    }
+
+    with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, stats in report["models"].items():
+        print(f"{name}: {stats['audio_seconds']}s аудіо за {stats['wall_seconds']}s "
+              f"({stats['throughput']}x), файлів {stats['files']}, помилок {stats['failed']}")
+    return report
+
 # ============================================================
 # UI
 # ============================================================
@@ -417,7 +997,7 @@ def main():
 
         if audio is not None:
             all_audio_segments.append(audio)
-            #print(f"    Озвучено ({len(audio)} samples, {len(audio)/48000:.1f}s)")
+            #print(f"    Озвучено ({len(audio)} samples, {len(audio)/SAMPLE_RATE:.1f}s)")
         else:
             print(f"    Не вдалося озвучити")
 
@@ -428,37 +1008,14 @@ def main():
     # Склеювання
     full_audio = np.concatenate(all_audio_segments)
 
-    buffer = BytesIO()
-    sf.write(buffer, full_audio, 48000, format="WAV")
-    buffer.seek(0)
-
-    # Визначення шляху
-    xdg_download = os.path.expanduser("~/Downloads")
-    config_file = os.path.expanduser("~/.config/user-dirs.dirs")
-
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, "r") as f:
-                for line in f:
-                    if line.startswith("XDG_DOWNLOAD_DIR"):
-                        path = line.split("=")[1].strip().strip('"')
-                        xdg_download = os.path.expandvars(path)
-        except Exception:
-            pass
-
-    output_file = os.path.join(xdg_download, "111.mp3")
+    output_file = os.path.join(get_download_dir(), "111.mp3")
 
     # Конвертація в MP3
-    proc = subprocess.run(
-        ["ffmpeg", "-y", "-i", "pipe:0", "-f", "mp3", output_file],
-        input=buffer.read(),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
+    proc = encode_audio(full_audio, output_file, "mp3")
 
     if proc.returncode == 0:
         #print(f"\nЗбережено у {output_file}")
-        print(f"Загальна тривалість: {len(full_audio)/48000:.1f} секунд")
+        print(f"Загальна тривалість: {len(full_audio)/SAMPLE_RATE:.1f} секунд")
 
         subprocess.run([
             "mpv",
@@ -472,4 +1029,13 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Озвучення тексту з буфера обміну")
+    parser.add_argument("--matrix", help="маніфест задач (JSON або JSON Lines) для пакетного рендеру")
+    parser.add_argument("--out", help="каталог для результатів пакетного рендеру")
+    parser.add_argument("--workers", type=int, default=2, help="кількість паралельних задач")
+    args = parser.parse_args()
+
+    if args.matrix:
+        render_matrix(load_manifest(args.matrix), args.out or os.path.join(get_download_dir(), "tts_matrix"), args.workers)
+    else:
+        main()